@@ -11,7 +11,32 @@ TOKSTATE=ROOT/"_ops"/"tokens"/"state.json"
 def sh(cmd):
     return subprocess.check_output(cmd, shell=True, text=True).strip()
 
+def read_ref(gitdir, ref):
+    loose=gitdir/ref
+    if loose.is_file():
+        return loose.read_text().strip()
+    for line in (gitdir/"packed-refs").read_text().splitlines():
+        sha,_,name=line.partition(" ")
+        if name==ref:
+            return sha
+    raise KeyError(ref)
+
 def git_info():
+    # read .git directly; forks git only for layouts this doesn't handle
+    # (worktrees/submodules where .git is a file, unborn branches, ...)
+    try:
+        gitdir=ROOT/".git"
+        head=(gitdir/"HEAD").read_text().strip()
+        if head.startswith("ref: "):
+            ref=head[5:]
+            branch=ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+            sha=read_ref(gitdir, ref)
+        else:
+            branch, sha="HEAD", head
+        name=ROOT.name
+        return (name[:-4] if name.endswith(".git") else name), branch, sha[:7]
+    except Exception:
+        pass
     try:
         repo=sh("basename -s .git `git rev-parse --show-toplevel`")
         branch=sh("git rev-parse --abbrev-ref HEAD")
@@ -20,24 +45,24 @@ def git_info():
     except Exception:
         return "unknown","unknown","unknown"
 
-def router_provider():
-    # read last timing or prefer policy first entry
+def load_json(p, default):
     try:
-        pol=json.loads(POLICY.read_text())
-        prio=pol.get("priority",[])
-        return prio[0] if prio else "openrouter"
+        return json.loads(Path(p).read_text())
     except Exception:
-        return "openrouter"
+        return default
 
-def policy_json():
-    try:
-        return json.dumps(json.loads(POLICY.read_text()), indent=2)
-    except Exception:
-        return "{}"
+def router_provider(pol):
+    # read last timing or prefer policy first entry
+    prio=pol.get("priority",[])
+    return prio[0] if prio else "openrouter"
+
+def policy_json(pol):
+    return json.dumps(pol, indent=2)
 
-def tokens_summary():
+def tokens_summary(st):
+    if st is None:
+        return "No data yet."
     try:
-        st=json.loads(TOKSTATE.read_text())
         provs=st.get("providers",{})
         parts=[]
         for name, data in provs.items():
@@ -52,23 +77,32 @@ def tokens_summary():
 def stamp():
     return datetime.datetime.utcnow().replace(microsecond=0).isoformat()+"Z"
 
-def replace_tag(text, tag, content):
-    pat=re.compile(rf"(<!--INIT:{tag}-->)(.*?)(<!--/INIT:{tag}-->)", re.S)
-    return pat.sub(rf"\1{content}\3", text)
+TAG_RE=re.compile(r"(<!--INIT:([A-Z0-9_]+)-->)(.*?)(<!--/INIT:\2-->)", re.S)
+
+def replace_tags(text, values):
+    # one pass over text; tags without a value keep their current content.
+    # A callback (not a \1...\3 template) so values are inserted literally.
+    return TAG_RE.sub(lambda m: m.group(1)+values.get(m.group(2), m.group(3))+m.group(4), text)
 
 def main():
     INIT.parent.mkdir(parents=True, exist_ok=True)
-    if not INIT.exists():
-        INIT.write_text("# INIT missing – run make init-refresh\n")
-    text=INIT.read_text()
+    try:
+        text=INIT.read_text()
+    except FileNotFoundError:
+        text="# INIT missing – run make init-refresh\n"
+        INIT.write_text(text)
     repo,branch,head=git_info()
-    text=replace_tag(text,"STAMP",stamp())
-    text=replace_tag(text,"GIT_REPO",repo)
-    text=replace_tag(text,"GIT_BRANCH",branch)
-    text=replace_tag(text,"GIT_HEAD",head)
-    text=replace_tag(text,"ROUTER_PROVIDER",router_provider())
-    text=replace_tag(text,"POLICY_JSON",policy_json())
-    text=replace_tag(text,"TOKENS_SUMMARY",tokens_summary())
+    pol=load_json(POLICY, {})
+    st=load_json(TOKSTATE, None)
+    text=replace_tags(text,{
+        "STAMP":stamp(),
+        "GIT_REPO":repo,
+        "GIT_BRANCH":branch,
+        "GIT_HEAD":head,
+        "ROUTER_PROVIDER":router_provider(pol),
+        "POLICY_JSON":policy_json(pol),
+        "TOKENS_SUMMARY":tokens_summary(st),
+    })
     INIT.write_text(text)
     print(f"Refreshed {INIT}")
 
@@ -8,28 +8,47 @@ INIT = ROOT / "_ops" / "init" / "INIT.md"
 USAGE = ROOT / "_ops" / "tokens" / "usage.json"
 STATE = ROOT / "_ops" / "tokens" / "state.json"
 
+_CFG = None
+_MADE = set()
+
 def cfg():
-    c = json.loads(CFG.read_text())
-    c["vault_path"] = str(Path(os.path.expanduser(c["vault_path"])).resolve())
-    return c
+    # loaded once per process; log-session re-enters via new_daily()
+    global _CFG
+    if _CFG is None:
+        c = json.loads(CFG.read_text())
+        c["vault_path"] = str(Path(os.path.expanduser(c["vault_path"])).resolve())
+        _CFG = c
+    return _CFG
 
 def ensure_dirs(*paths):
     for p in paths:
+        key = str(p)
+        if key in _MADE:
+            continue
         Path(p).mkdir(parents=True, exist_ok=True)
+        _MADE.add(key)
+
+_FMT = {}
+
+def strftime_fmt(fmt: str) -> str:
+    r = _FMT.get(fmt)
+    if r is None:
+        r = _FMT[fmt] = fmt.replace("yyyy", "%Y").replace("mm", "%m").replace("dd", "%d")
+    return r
 
 def today_title(fmt: str) -> str:
-    d = datetime.date.today()
-    return d.strftime(fmt.replace("yyyy", "%Y").replace("mm", "%m").replace("dd", "%d"))
+    return datetime.date.today().strftime(strftime_fmt(fmt))
 
 def sync_init():
     c = cfg()
     dst_dir = Path(c["vault_path"]) / c["ops_folder"]
     ensure_dirs(dst_dir)
-    if INIT.exists():
+    try:
         shutil.copy2(INIT, dst_dir / "INIT.md")
-        print(f"INIT synced → {dst_dir/'INIT.md'}")
-    else:
+    except FileNotFoundError:
         print("INIT not found (run `make init-refresh` first).")
+        return
+    print(f"INIT synced → {dst_dir/'INIT.md'}")
 
 def export_usage():
     c = cfg()
@@ -70,12 +89,14 @@ def log_session():
     note = daily_dir / f"{title}.md"
     if not note.exists():
         new_daily()
+    has_header = "### AI Sessions" in note.read_text(encoding="utf-8")
     provider = os.getenv("OB_PROVIDER", "unknown")
     ok = os.getenv("OB_OK", "false")
     ms = os.getenv("OB_MS", "0")
     line = f"- {datetime.datetime.now().strftime('%H:%M:%S')} · **{provider}** · {'✅' if ok=='true' else '❌'} · {ms} ms\n"
     with open(note, "a", encoding="utf-8") as f:
-        f.write("\n### AI Sessions\n" if "### AI Sessions" not in note.read_text(encoding="utf-8") else "")
+        if not has_header:
+            f.write("\n### AI Sessions\n")
         f.write(line)
     print(f"Logged session → {note}")
 
@@ -1,28 +1,53 @@
 #!/usr/bin/env python3
-import sys, json
+import sys, json, re
 from pathlib import Path
 INIT=Path("_ops/init/INIT.md")
+SECTION_RE=re.compile(r"<!--INIT:([A-Z0-9_]+)-->(.*?)<!--/INIT:\1-->", re.S)
+_INIT={"mtime":None,"text":"","sections":{}}
+
+try:
+    import orjson
+    _loads=orjson.loads
+    _dumpb=orjson.dumps
+except ImportError:
+    _loads=json.loads
+    def _dumpb(obj): return json.dumps(obj).encode()
+
+def reply(obj):
+    out=sys.stdout.buffer
+    out.write(_dumpb(obj)+b"\n")
+    out.flush()
+
+def refresh():
+    # re-read and re-split INIT.md only when it changed on disk
+    try:
+        mtime=INIT.stat().st_mtime_ns
+    except OSError:
+        _INIT.update(mtime=None, text="", sections={})
+        return _INIT
+    if mtime!=_INIT["mtime"]:
+        text=INIT.read_text()
+        secs={tag:body.strip() for tag,body in SECTION_RE.findall(text)}
+        _INIT.update(mtime=mtime, text=text, sections=secs)
+    return _INIT
 
 def section(name:str)->str:
-    import re
-    tag=name.upper()
-    t=INIT.read_text() if INIT.exists() else ""
-    m=re.search(rf"<!--INIT:{tag}-->(.*?)<!--/INIT:{tag}-->", t, re.S)
-    return (m.group(1).strip() if m else "")
+    return refresh()["sections"].get(name.upper(), "")
 
 def main():
-    for line in sys.stdin:
+    for line in iter(sys.stdin.buffer.readline, b""):
+        if not line.strip():
+            continue
         try:
-            req=json.loads(line.strip())
+            req=_loads(line)
             if req.get("method")=="get_init":
-                txt=INIT.read_text() if INIT.exists() else ""
-                print(json.dumps({"ok":True,"data":{"text":txt}}), flush=True)
+                reply({"ok":True,"data":{"text":refresh()["text"]}})
             elif req.get("method")=="get_section":
                 name=req.get("args",{}).get("name","")
-                print(json.dumps({"ok":True,"data":{"name":name,"text":section(name)}}), flush=True)
+                reply({"ok":True,"data":{"name":name,"text":section(name)}})
             else:
-                print(json.dumps({"ok":False,"error":"unknown_method"}), flush=True)
+                reply({"ok":False,"error":"unknown_method"})
         except Exception as e:
-            print(json.dumps({"ok":False,"error":str(e)}), flush=True)
+            reply({"ok":False,"error":str(e)})
 if __name__=="__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,11 +2,17 @@
 """
 Omarchy Launcher Waybar Module
 Displays launcher status and quick access to AI subagents
+
+Runs as a long-lived process printing one JSON line per tick; configure the
+Waybar custom module with "exec": "omarchy-launcher-module.py" and omit
+"interval" so Waybar reads the stream continuously. Pass --once for the old
+print-and-exit behaviour (used with an "interval").
 """
 
 import json
 import os
 import subprocess
+import sys
 import time
 from pathlib import Path
 
@@ -17,7 +23,20 @@ class OmarchyLauncherModule:
         self.config_dir = self.home_dir / ".config" / "omarchy" / "launcher"
         self.status_file = self.config_dir / "status.json"
         self.last_update = 0
-        self.ai_status = {}
+        self.ai_status = {'active': 0, 'total': 0, 'knowledge': 0, 'tasks': 0}
+        self.mtimes = {}
+        self.launcher_status = 'ready'
+
+    def changed(self, path):
+        """Return True if path's mtime differs from the last call"""
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if self.mtimes.get(path, 0) == mtime:
+            return False
+        self.mtimes[path] = mtime
+        return True
 
     def get_ai_status(self):
         """Get current AI team status"""
@@ -27,7 +46,7 @@ class OmarchyLauncherModule:
         try:
             # Read AI team status
             status_file = self.home_dir / "Documents" / "omarchy-ai-assist" / "knowledge-outbox" / "team-status" / "latest.json"
-            if status_file.exists():
+            if self.changed(status_file) and status_file.exists():
                 with open(status_file, 'r') as f:
                     data = json.load(f)
                     overview = data.get('overview', {})
@@ -45,14 +64,17 @@ class OmarchyLauncherModule:
 
     def get_launcher_status(self):
         """Get launcher status"""
+        if not self.changed(self.status_file):
+            return self.launcher_status
+        self.launcher_status = 'ready'
         try:
             if self.status_file.exists():
                 with open(self.status_file, 'r') as f:
                     data = json.load(f)
-                    return data.get('status', 'ready')
+                    self.launcher_status = data.get('status', 'ready')
         except Exception:
             pass
-        return 'ready'
+        return self.launcher_status
 
     def get_text(self):
         """Get module text"""
@@ -93,9 +115,18 @@ class OmarchyLauncherModule:
             "tooltip": tooltip,
             "class": "omarchy-launcher",
             "percentage": 100 if self.get_launcher_status() == 'ready' else 0
-        }))
+        }), flush=True)
+
+    def run_loop(self, interval=5):
+        """Emit one line per interval for Waybar's continuous exec mode"""
+        while True:
+            self.output()
+            time.sleep(interval)
 
 
 if __name__ == "__main__":
     module = OmarchyLauncherModule()
-    module.output()
\ No newline at end of file
+    if "--once" in sys.argv[1:]:
+        module.output()
+    else:
+        module.run_loop()
\ No newline at end of file
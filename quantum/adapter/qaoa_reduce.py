@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
-import sys, json, os, random, hashlib, time
+import sys, json, os, re, hashlib, time
+
+_MULTISPACE = re.compile(r' {2,}')
+_MULTINL = re.compile(r'\n{3,}')
 
 def hash_prompt(s): return hashlib.sha256(s.encode()).hexdigest()[:12]
 
@@ -24,20 +27,25 @@ def classical_reduce(prompt:str)->str:
 def pseudo_qaoa_energy(s):
     # Toy energy = length + repeat penalty; lower is better
     length = len(s)
-    repeats = sum(s.count(w) for w in set(s.split()) if len(w)>6) // 5
+    # total occurrences of long tokens; no per-word tally needed
+    repeats = sum(1 for w in s.split() if len(w)>6) // 5
     return length + 5*repeats
 
+def squash(s):
+    return _MULTINL.sub('\n\n', _MULTISPACE.sub(' ', s))
+
+def drop_blank_lines(s):
+    return "\n".join([l for i,l in enumerate(s.splitlines()) if i==0 or l.strip()])
+
 def attempt_qaoa(prompt):
-    # If PennyLane/Qiskit installed, you'd call them here. For now, random local search.
+    # If PennyLane/Qiskit installed, you'd call them here. For now, pick the
+    # lowest-energy of a fixed set of whitespace reductions.
     best = classical_reduce(prompt)
-    bestE = pseudo_qaoa_energy(best)
-    for _ in range(32):
-        cand = best.replace("  "," ").replace("\n\n\n","\n\n")
-        if random.random()<0.3: cand = cand.replace("  ", " ")
-        if random.random()<0.2:  cand = "\n".join([l for i,l in enumerate(cand.splitlines()) if i==0 or l.strip()])
-        E = pseudo_qaoa_energy(cand)
-        if E < bestE: best, bestE = cand, E
-    return best, bestE
+    squashed = squash(best)
+    cands = [best, squashed, drop_blank_lines(squashed)]
+    energies = [pseudo_qaoa_energy(c) for c in cands]
+    i = min(range(len(cands)), key=energies.__getitem__)
+    return cands[i], energies[i]
 
 def main():
     raw = sys.stdin.read()
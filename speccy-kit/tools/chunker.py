@@ -2,6 +2,13 @@ import sys
 import json
 import hashlib
 
+try:
+    import orjson
+    _dumpb = orjson.dumps
+except ImportError:
+    def _dumpb(obj):
+        return json.dumps(obj).encode('utf-8')
+
 def main():
     if len(sys.argv) != 7:
         print("Usage: python chunker.py <file_path> <pack_id> <max_chars> <overlap> <temp_file> <root_dir>")
@@ -14,10 +21,13 @@ def main():
     temp_file = sys.argv[5]
     root_dir = sys.argv[6]
 
-    with open(file_path, 'r') as f:
-        content = f.read()
+    with open(file_path, 'rb') as f:
+        data = f.read()
 
-    sha = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    # hash the bytes as read (same digest as `sha256sum`), then decode once
+    # with text-mode newline handling for character-based chunking
+    sha = hashlib.sha256(data).hexdigest()
+    content = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
     rel_path = file_path.replace(root_dir, '').lstrip('/')
 
     chunks = []
@@ -32,15 +42,18 @@ def main():
         
         start += max_chars - overlap
 
-    with open(temp_file, 'a') as f:
-        for chunk in chunks:
-            data = {
-                'pack_id': pack_id,
-                'source': rel_path,
-                'sha256': sha,
-                'text': chunk
-            }
-            f.write(json.dumps(data) + '\n')
+    # Every record shares the same leading fields; encode them once and only
+    # serialize the chunk text per line.
+    prefix = _dumpb({
+        'pack_id': pack_id,
+        'source': rel_path,
+        'sha256': sha,
+        'text': ''
+    })[:-3]
+    lines = [prefix + _dumpb(chunk) + b'}\n' for chunk in chunks]
+
+    with open(temp_file, 'ab') as f:
+        f.writelines(lines)
 
 if __name__ == '__main__':
     main()
@@ -1,34 +1,92 @@
 #!/usr/bin/env python3
 import json, sys, hashlib, os, pathlib, re
+from concurrent.futures import ProcessPoolExecutor
 
-# Simple shingle Jaccard + SimHash-lite to catch near-duplicates without libs
-def shingles(text, k=8):
-    t = re.sub(r'\s+', ' ', text.lower()).strip()
-    return { t[i:i+k] for i in range(max(0, len(t)-k+1)) } if t else set()
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumpb = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    def _dumpb(obj): return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+IO_BLOCK = 1 << 20  # read buffer and write flush size
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    print("[condenser] numpy required", file=sys.stderr)
+    sys.exit(1)
+
+# One-permutation MinHash + LSH banding to find near-duplicate candidates;
+# candidates are then confirmed with exact shingle Jaccard before archiving.
+SHINGLE = 8            # bytes per shingle -> each window is one uint64
+SIG_BINS = 64          # signature length (power of two)
+BAND_ROWS = 4          # rows per LSH band -> SIG_BINS // BAND_ROWS bands
+_SHIFT = np.uint64(SIG_BINS.bit_length() - 1)
+_MASK = np.uint64(SIG_BINS - 1)
+_EMPTY = np.uint64(0xFFFFFFFFFFFFFFFF)
+# splitmix64 finalizer: stable across runs (unlike salted str hash())
+_M1, _M2 = np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB)
+_S1, _S2, _S3 = np.uint64(30), np.uint64(27), np.uint64(31)
+_WS_RE = re.compile(r'\s+')
+
+def shingle_hashes(text):
+    """Sorted unique 64-bit hashes of the normalized text's 8-byte shingles."""
+    t = _WS_RE.sub(' ', text.lower()).strip().encode('utf-8')
+    if len(t) < SHINGLE:
+        return np.empty(0, dtype=np.uint64)
+    win = sliding_window_view(np.frombuffer(t, dtype=np.uint8), SHINGLE)
+    h = np.ascontiguousarray(win).view('<u8').ravel()
+    h = (h ^ (h >> _S1)) * _M1
+    h = (h ^ (h >> _S2)) * _M2
+    h ^= h >> _S3
+    return np.unique(h)
+
+def minhash(hs):
+    # low bits pick the bin, high bits compete for that bin's minimum
+    sig = np.full(SIG_BINS, _EMPTY, dtype=np.uint64)
+    np.minimum.at(sig, (hs & _MASK).astype(np.intp), hs >> _SHIFT)
+    return sig
 
 def jaccard(a, b):
-    if not a or not b: return 0.0
-    inter = len(a & b); union = len(a | b)
-    return inter / union if union else 0.0
+    if not a.size or not b.size: return 0.0
+    inter = np.intersect1d(a, b, assume_unique=True).size
+    return inter / (a.size + b.size - inter)
+
+def band_keys(sig):
+    keys = []
+    for i in range(0, SIG_BINS, BAND_ROWS):
+        rows = sig[i:i+BAND_ROWS]
+        if (rows != _EMPTY).any():  # empty bands match everything
+            keys.append((i, rows.tobytes()))
+    return keys
 
-def simkey(text, buckets=64):
-    t = re.sub(r'\s+', ' ', text.lower()).strip().encode('utf-8')
-    h = hashlib.sha256(t).digest()
-    # map to 64-bit fingerprint
-    return int.from_bytes(h[:8], 'big')
+def write_jsonl(path, mode, objs):
+    # coalesce records into ~IO_BLOCK writes instead of one write per line
+    buf = bytearray()
+    with open(path, mode) as wf:
+        for obj in objs:
+            buf += _dumpb(obj); buf += b'\n'
+            if len(buf) >= IO_BLOCK:
+                wf.write(buf); buf.clear()
+        if buf:
+            wf.write(buf)
 
 def condense_index(index_path, out_path, archive_path, jacc_min=0.88):
     keep = []
     seen_hash = set()
-    buckets = {}  # simkey -> list of (idx, shingles)
+    shs = []    # shingle hashes per kept doc, indexed like keep
+    bands = {}  # (band, rows) -> list of kept idx
 
     archived = []
-    with open(index_path, 'r', encoding='utf-8') as f:
+    with open(index_path, 'rb', buffering=IO_BLOCK) as f:
         for line in f:
             line = line.strip()
             if not line: continue
             try:
-                obj = json.loads(line)
+                obj = _loads(line)
             except Exception:
                 continue
             txt = (obj.get('text') or '').strip()
@@ -39,31 +97,45 @@ def condense_index(index_path, out_path, archive_path, jacc_min=0.88):
             if ex in seen_hash:
                 archived.append(obj)
                 continue
-            # near-dup test inside similar bucket
-            key = simkey(txt)
-            sh = shingles(txt)
+            # near-dup test against docs sharing at least one band
+            sh = shingle_hashes(txt)
+            keys = band_keys(minhash(sh))
             near = False
-            bucket = buckets.setdefault(key, [])
-            for idx, sh_ref in bucket:
-                if jaccard(sh, sh_ref) >= jacc_min:
-                    near = True
-                    break
+            checked = set()
+            for key in keys:
+                for idx in bands.get(key, ()):
+                    if idx in checked: continue
+                    checked.add(idx)
+                    if jaccard(sh, shs[idx]) >= jacc_min:
+                        near = True
+                        break
+                if near: break
             if near:
                 archived.append(obj)
             else:
                 seen_hash.add(ex)
-                bucket.append((len(keep), sh))
+                for key in keys:
+                    bands.setdefault(key, []).append(len(keep))
+                shs.append(sh)
                 keep.append(obj)
 
-    with open(out_path, 'w', encoding='utf-8') as wf:
-        for obj in keep:
-            wf.write(json.dumps(obj, ensure_ascii=False) + '\n')
+    write_jsonl(out_path, 'wb', keep)
     if archived:
-        with open(archive_path, 'a', encoding='utf-8') as af:
-            for obj in archived:
-                af.write(json.dumps(obj, ensure_ascii=False) + '\n')
+        write_jsonl(archive_path, 'ab', archived)
     return len(keep), len(archived)
 
+def condense_pack(p, jmin):
+    pack_dir = p.parent
+    out = pack_dir / 'index.compact.jsonl'
+    arc = pack_dir / 'index.archive.jsonl'
+    kept, arch = condense_index(str(p), str(out), str(arc), jmin)
+    # atomically switch to compact if it helped
+    try:
+        os.replace(out, p)  # overwrite original with compacted
+    except Exception:
+        pass
+    return pack_dir.name, kept, arch
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: condenser.py <packs_dir> [jacc_min]", file=sys.stderr)
@@ -71,19 +143,18 @@ def main():
     packs_dir = pathlib.Path(sys.argv[1])
     jmin = float(sys.argv[2]) if len(sys.argv) > 2 else 0.88
 
+    # packs are independent: condense them in parallel, report in glob order
+    packs = list(packs_dir.glob('*/index.jsonl'))
+    if len(packs) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(packs), os.cpu_count() or 1)) as ex:
+            results = list(ex.map(condense_pack, packs, [jmin] * len(packs)))
+    else:
+        results = [condense_pack(p, jmin) for p in packs]
+
     total_kept = total_arch = 0
-    for p in packs_dir.glob('*/index.jsonl'):
-        pack_dir = p.parent
-        out = pack_dir / 'index.compact.jsonl'
-        arc = pack_dir / 'index.archive.jsonl'
-        kept, arch = condense_index(str(p), str(out), str(arc), jmin)
-        # atomically switch to compact if it helped
-        try:
-            os.replace(out, p)  # overwrite original with compacted
-        except Exception:
-            pass
+    for name, kept, arch in results:
         total_kept += kept; total_arch += arch
-        print(f"[condense] {pack_dir.name}: kept={kept} archived={arch}")
+        print(f"[condense] {name}: kept={kept} archived={arch}")
     print(f"[condense] total kept={total_kept} archived={total_arch}")
 
 if __name__ == '__main__':
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import pathlib, re, json, time
 
+_WS_RE = re.compile(r'\s+')
+
 def read_text(p):
     try: return pathlib.Path(p).read_text(encoding='utf-8')
     except: return ""
 
 def norm(s):
-    return re.sub(r'\s+', ' ', s.lower()).strip()
+    return _WS_RE.sub(' ', s.lower()).strip()
 
 def shingles(s, k=8):
+    # hash to ints so each lesson holds a set of small ints, not 8-char strs
     s = norm(s)
-    return { s[i:i+k] for i in range(max(0, len(s)-k+1)) } if s else set()
+    return frozenset(hash(s[i:i+k]) for i in range(max(0, len(s)-k+1))) if s else frozenset()
 
 def jacc(a,b):
     if not a or not b: return 0.0
@@ -35,6 +38,10 @@ def main():
     for f, t, sh, _ in metas:
         dup = None
         for cf, ct, csh in canon:
+            # jaccard <= min(|a|,|b|)/max(|a|,|b|): skip pairs too different in size
+            la, lb = len(sh), len(csh)
+            if min(la, lb) < THRESH * max(la, lb):
+                continue
             if jacc(sh, csh) >= THRESH:
                 dup = cf; break
         if dup:
@@ -166,7 +166,6 @@ process_file() {
   local f="$1" pack_id="$2" max_chars="$3" overlap="$4" temp_file="$5"
 
   local rel_path="${f#$ROOT/}"
-  local sha=$(sha256sum "$f" | awk '{print $1}')
 
   python3 "$ROOT/omarchy-ai-assist/speccy-kit/tools/chunker.py" "$f" "$pack_id" "$max_chars" "$overlap" "$temp_file" "$ROOT"
 
@@ -6,16 +6,42 @@ ROOT = Path(__file__).resolve().parents[1]
 POLICY = ROOT / "_ops" / "agents" / "switchboard.policy.json"
 USAGE  = ROOT / "_ops" / "tokens" / "usage.json"
 
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumpb = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    def _dumpb(obj): return json.dumps(obj).encode()
+
+_POLICY = {"mtime": None, "data": {}}
+
 def load_json(p, default):
     try:
         return json.loads(Path(p).read_text())
     except Exception:
         return default
 
+def load_policy():
+    # re-read the policy only when it changed on disk since the last request
+    try:
+        mtime = POLICY.stat().st_mtime_ns
+    except OSError:
+        return {}
+    if mtime != _POLICY["mtime"]:
+        _POLICY["data"] = load_json(POLICY, {})
+        _POLICY["mtime"] = mtime
+    return _POLICY["data"]
+
+def reply(obj):
+    out = sys.stdout.buffer
+    out.write(_dumpb(obj) + b"\n")
+    out.flush()
+
 def now_ms(): return int(time.time()*1000)
 
 def pick_provider():
-    pol = load_json(POLICY, {})
+    pol = load_policy()
     prio = pol.get("priority", [])
     providers = pol.get("providers", {})
     # honor deny_until and prefer flags
@@ -40,22 +66,24 @@ def record_session(provider, ok=True, ms=0, meta=None):
 
 def main():
     # very small stdio MCP: {"method":"route", "args":{"hint":"chat|code"}}
-    for line in sys.stdin:
+    for line in iter(sys.stdin.buffer.readline, b""):
+        if not line.strip():
+            continue
         try:
-            req = json.loads(line.strip())
+            req = _loads(line)
             if req.get("method") == "route":
                 p = pick_provider()
-                pol = load_json(POLICY, {})
+                pol = load_policy()
                 cli = pol.get("providers",{}).get(p,{}).get("cli","goose")
-                print(json.dumps({"ok":True, "data":{"provider":p,"cli":cli}}), flush=True)
+                reply({"ok":True, "data":{"provider":p,"cli":cli}})
             elif req.get("method") == "record":
                 a = req.get("args",{})
                 record_session(a.get("provider","openrouter"), a.get("ok",True), a.get("duration_ms",0), a.get("meta",{}))
-                print(json.dumps({"ok":True}), flush=True)
+                reply({"ok":True})
             else:
-                print(json.dumps({"ok":False,"error":"unknown_method"}), flush=True)
+                reply({"ok":False,"error":"unknown_method"})
         except Exception as e:
-            print(json.dumps({"ok":False,"error":str(e)}), flush=True)
+            reply({"ok":False,"error":str(e)})
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -16,12 +16,14 @@ import os
 import random
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
 try:
     import numpy as np
 except ImportError:
-    print("[om-lambda-opt] numpy required", file=sys.stderr)\n    sys.exit(1)
+    print("[om-lambda-opt] numpy required", file=sys.stderr)
+    sys.exit(1)
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -31,49 +33,58 @@ except ImportError:
 
 
 class PromptOptimizer:
-    def __init__(self, alpha: float, beta: float, gamma: float, samples: int, provider: str, agent: str):
+    def __init__(self, alpha: float, beta: float, gamma: float, samples: int, provider: str, agent: str, workers: int = 4):
         self.alpha = alpha
         self.beta = beta
         self.gamma = gamma
         self.samples = samples
         self.provider = provider
         self.agent = agent
+        self.workers = workers
         self.model = SentenceTransformer("all-MiniLM-L6-v2")
 
     def token_cost(self, prompt: str) -> float:
         return len(prompt.split())
 
     def embed(self, texts: List[str]) -> np.ndarray:
-        return self.model.encode(texts)
-
-    def semantic_distance(self, target_vec: np.ndarray, candidate_vec: np.ndarray) -> float:
-        denom = np.linalg.norm(target_vec) * np.linalg.norm(candidate_vec)
-        if denom == 0:
-            return 1.0
-        cos = float(np.dot(target_vec, candidate_vec) / denom)
-        return max(0.0, 1.0 - cos)
-
-    def temporal_decay(self, outputs: List[str]) -> float:
-        if len(outputs) <= 1:
+        vecs = self.model.encode(
+            texts, batch_size=64, show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return np.ascontiguousarray(vecs, dtype=np.float32)
+
+    @staticmethod
+    def unit_rows(mat: np.ndarray) -> np.ndarray:
+        """L2-normalize each row; all-zero rows stay zero (distance 1.0)."""
+        norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+        return np.divide(mat, norms, out=np.zeros_like(mat), where=norms > 0)
+
+    def semantic_distance_batch(self, target_vec: np.ndarray, candidate_vecs: np.ndarray) -> np.ndarray:
+        """Cosine distance of each row to target; both must already be unit length."""
+        return np.clip(1.0 - candidate_vecs @ target_vec, 0.0, 2.0)
+
+    def temporal_decay(self, vecs: np.ndarray) -> float:
+        if len(vecs) <= 1:
             return 0.0
-        vecs = self.embed(outputs)
         var = np.mean(np.var(vecs, axis=0))
         return float(var)
 
-    def generate_outputs(self, prompt: str) -> List[str]:
-        outputs = []
-        for _ in range(self.samples):
-            env = os.environ.copy()
-            env["PROMPT_OVERRIDE"] = prompt
-            proc = subprocess.run(
-                ["om-agent", self.agent, self.provider],
-                input=b"",
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=env,
-            )
-            outputs.append(proc.stdout.decode("utf-8", errors="replace").strip())
-        return outputs
+    def run_agent(self, prompt: str) -> str:
+        env = os.environ.copy()
+        env["PROMPT_OVERRIDE"] = prompt
+        proc = subprocess.run(
+            ["om-agent", self.agent, self.provider],
+            input=b"",
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        return proc.stdout.decode("utf-8", errors="replace").strip()
+
+    def generate_outputs(self, prompts: List[str]) -> List[List[str]]:
+        """Run self.samples agent calls per prompt concurrently; one output list per prompt."""
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = [[pool.submit(self.run_agent, p) for _ in range(self.samples)] for p in prompts]
+            return [[f.result() for f in group] for group in futures]
 
     def mutate_prompt(self, prompt: str) -> List[str]:
         tokens = prompt.split()
@@ -90,31 +101,40 @@ class PromptOptimizer:
             candidates.add(" ".join(tokens))
         return list(candidates)
 
-    def energy(self, prompt: str, target_vec: np.ndarray) -> Tuple[float, float, float, float]:
+    def energy(self, prompt: str, vecs: np.ndarray, D: float) -> Tuple[float, float, float, float]:
         C = self.token_cost(prompt)
-        outputs = self.generate_outputs(prompt)
-        if not outputs:
+        if not len(vecs):
             return float("inf"), C, float("inf"), float("inf")
-        output_vec = np.mean(self.embed(outputs), axis=0)
-        D = self.semantic_distance(target_vec, output_vec)
-        T = self.temporal_decay(outputs)
+        T = self.temporal_decay(vecs)
         E = self.alpha * C + self.beta * D + self.gamma * T
         return E, C, D, T
 
     def optimize(self, prompt: str) -> Tuple[str, float, float, float, float]:
-        baseline_outputs = self.generate_outputs(prompt)
-        if not baseline_outputs:
+        # Gather every agent output up front (baseline intent run, the prompt
+        # itself, then each mutation) so they can be embedded in one batch.
+        candidates = [prompt] + [c for c in self.mutate_prompt(prompt) if c != prompt]
+        groups = self.generate_outputs([prompt] + candidates)
+        if not groups[0]:
             raise RuntimeError("No baseline outputs generated")
-        intent_vec = np.mean(self.embed(baseline_outputs), axis=0)
 
-        baseline_energy, C, D, T = self.energy(prompt, intent_vec)
-        best_prompt = prompt
-        best_energy = baseline_energy
-        best_components = (C, D, T)
+        flat = [out for group in groups for out in group]
+        vecs = self.embed(flat)
+        bounds = np.cumsum([0] + [len(group) for group in groups])
+        group_vecs = [vecs[bounds[i]:bounds[i + 1]] for i in range(len(groups))]
+
+        # Means of unit vectors are not unit length: renormalize once so every
+        # distance below is a single dot product.
+        intent_vec = self.unit_rows(np.mean(group_vecs[0], axis=0))
+        cand_means = self.unit_rows(np.stack([v.mean(axis=0) for v in group_vecs[1:]]))
+        distances = self.semantic_distance_batch(intent_vec, cand_means)
+
+        best_prompt = None
+        best_energy = float("inf")
+        best_components = (0.0, 0.0, 0.0)
 
-        for candidate in self.mutate_prompt(prompt):
-            energy_val, c_val, d_val, t_val = self.energy(candidate, intent_vec)
-            if energy_val < best_energy:
+        for candidate, cand_vecs, dist in zip(candidates, group_vecs[1:], distances):
+            energy_val, c_val, d_val, t_val = self.energy(candidate, cand_vecs, float(dist))
+            if best_prompt is None or energy_val < best_energy:
                 best_prompt = candidate
                 best_energy = energy_val
                 best_components = (c_val, d_val, t_val)
@@ -131,6 +151,7 @@ def main():
     parser.add_argument("--samples", type=int, default=3)
     parser.add_argument("--provider", type=str, default="gemini")
     parser.add_argument("--agent", type=str, default="sherlock-ohms")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent om-agent calls")
     parser.add_argument("--json", action="store_true")
     args = parser.parse_args()
 
@@ -146,6 +167,7 @@ def main():
         samples=args.samples,
         provider=args.provider,
         agent=args.agent,
+        workers=args.workers,
     )
 
     best_prompt, energy, C, D, T = optimizer.optimize(prompt_text)
@@ -10,30 +10,45 @@ if len(sys.argv) < 3:
 
 trace_path = Path(sys.argv[1])
 out_path = Path(sys.argv[2])
-records = []
+states_seen = set()
+actions = Counter()
+count = 0
+reward_min = reward_max = reward_sum = 0
+first_id = "unknown"
 with trace_path.open() as fh:
     for line in fh:
         line = line.strip()
         if not line:
             continue
         try:
-            records.append(json.loads(line))
+            r = json.loads(line)
         except json.JSONDecodeError:
-            pass
+            continue
+        reward = r.get("reward", 0)
+        if count == 0:
+            first_id = r.get("id", "unknown")
+            reward_min = reward_max = reward
+        elif reward < reward_min:
+            reward_min = reward
+        elif reward > reward_max:
+            reward_max = reward
+        reward_sum += reward
+        count += 1
+        states_seen.add(r.get("state", ""))
+        actions[r.get("action", "")] += 1
 
-if not records:
+if not count:
     raise SystemExit("no records parsed")
 
-states = sorted({r.get("state", "") for r in records})
-actions = Counter(r.get("action", "") for r in records)
+states = sorted(states_seen)
 reward_stats = {
-    "count": len(records),
-    "min": min(r.get("reward", 0) for r in records),
-    "max": max(r.get("reward", 0) for r in records),
-    "avg": sum(r.get("reward", 0) for r in records) / len(records),
+    "count": count,
+    "min": reward_min,
+    "max": reward_max,
+    "avg": reward_sum / count,
 }
 contract = {
-    "id": "contract-" + records[0].get("id", "unknown")[:8],
+    "id": "contract-" + first_id[:8],
     "inputs": ["state"],
     "outputs": ["action", "reward"],
     "states": states,
@@ -12,22 +12,32 @@ Workflow:
 4. Accepts candidate if information density improves (shorter prompt, similar semantics).
 
 Requires: python3, sentence-transformers, numpy, scipy, jq (if parsing JSON metadata).
+Uses the zstandard module for compression when installed, else the zstd CLI.
+
+By default the command is run once per sample with the prompt in $PROMPT_OVERRIDE
+and the sample on stdin. With --persistent it is started once and must loop on
+stdin reading two frames (prompt, then sample) and writing one reply frame,
+each frame being "<byte length>\\n<utf-8 bytes>".
 """
 
 import argparse
 import hashlib
 import json
 import math
+import multiprocessing as mp
 import os
-import random
 import shutil
 import string
 import subprocess
 import sys
-import tempfile
-from dataclasses import dataclass
+import threading
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
 
 try:
     import numpy as np
@@ -36,11 +46,20 @@ except ImportError:
     sys.exit(1)
 
 try:
+    import torch  # installed with sentence-transformers
     from sentence_transformers import SentenceTransformer
 except ImportError:
     print("[prompt-annealer] sentence-transformers required (pip install sentence-transformers)", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import zstandard
+    # One compressor for the whole run: no fork/exec or temp files per
+    # candidate, and zstd's context stays allocated between calls.
+    _ZCTX = zstandard.ZstdCompressor(level=22, threads=-1)
+except ImportError:
+    _ZCTX = None
+
 
 @dataclass
 class PromptCandidate:
@@ -54,139 +73,339 @@ class PromptCandidate:
 def shannon_entropy(tokens: Sequence[str]) -> float:
     if not tokens:
         return 0.0
-    counts = {}
-    for tok in tokens:
-        counts[tok] = counts.get(tok, 0) + 1
-    total = len(tokens)
-    entropy = 0.0
-    for freq in counts.values():
-        p = freq / total
-        entropy -= p * math.log(p, 2)
-    return entropy
-
-
-def compress_size(text: str) -> int:
-    """Returns size of zstd-compressed text in bytes (using system zstd)."""
-    with tempfile.NamedTemporaryFile(delete=False) as tmp_in:
-        tmp_in.write(text.encode("utf-8"))
-        tmp_in_path = tmp_in.name
-    tmp_out_path = tmp_in_path + ".zst"
+    # Counter tallies in C; np.unique would sort an object array of str instead.
+    counts = Counter(tokens)
+    freqs = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    p = freqs / len(tokens)
+    return 0.0 - float((p * np.log2(p)).sum())
+
+
+@lru_cache(maxsize=4096)
+def compress_size(data: bytes) -> int:
+    """Returns size of zstd-compressed data in bytes (cached: annealing revisits prompts)."""
+    if _ZCTX is not None:
+        return len(_ZCTX.compress(data))
+    proc = subprocess.run(
+        ["zstd", "-q", "-c", "-T0", "--ultra", "-22"],
+        input=data,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    return len(proc.stdout)
+
+
+# Embeddings live on the model's device: numpy on CPU, torch tensors on CUDA.
+Vectors = Union[np.ndarray, torch.Tensor]
+_EMB_CACHE: Dict[bytes, Vectors] = {}
+
+
+def set_compression_dict(samples: List[bytes]):
+    """Primes the compressor with a dictionary built from the run's sample text.
+
+    The samples must not contain the prompt itself: any prompt text in the
+    dictionary compresses to a back-reference, so deleting lines would stop
+    shrinking compress_size. Too little data to train on falls back to a
+    raw-content dictionary. The zstd CLI fallback stays dictionary-less.
+    """
+    global _ZCTX
+    samples = [s for s in samples if s]
+    if _ZCTX is None or not samples:
+        return
+    try:
+        zdict = zstandard.train_dictionary(32 * 1024, samples)
+    except zstandard.ZstdError:
+        zdict = zstandard.ZstdCompressionDict(b"".join(samples), dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    _ZCTX = zstandard.ZstdCompressor(level=22, threads=-1, dict_data=zdict)
+    compress_size.cache_clear()
+
+
+def load_model() -> SentenceTransformer:
+    """Loads the embedder at reduced precision: fp16 on CUDA, int8 Linear layers on CPU."""
+    if torch.cuda.is_available():
+        return SentenceTransformer("all-MiniLM-L6-v2", device="cuda").half()
+    model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+    # Dynamic quantization keeps activations in fp32 and runs the MatMuls in int8.
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def encode_cached(model: SentenceTransformer, texts: List[str]) -> Vectors:
+    """Embeds texts as unit vectors, reusing vectors for outputs already seen this run."""
+    on_gpu = model.device.type == "cuda"
+    keys = [hashlib.sha256(t.encode("utf-8")).digest() for t in texts]
+    misses = {}
+    for key, text in zip(keys, texts):
+        if key not in _EMB_CACHE:
+            misses.setdefault(key, text)
+    if misses:
+        batch = list(misses.values())
+        if on_gpu:
+            # Stay on device: no host copy until the similarity is reduced.
+            vecs = model.encode(batch, batch_size=32, convert_to_tensor=True, normalize_embeddings=True).float()
+        else:
+            vecs = model.encode(batch, batch_size=32, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32, copy=False)
+        _EMB_CACHE.update(zip(misses.keys(), vecs))
+    rows = [_EMB_CACHE[key] for key in keys]
+    return torch.stack(rows) if on_gpu else np.stack(rows)
+
+
+def mean_similarity(vectors: Vectors, baseline_vectors: Vectors) -> float:
+    """Mean cosine of each output with its baseline: a row-wise dot of unit vectors."""
+    if len(vectors) == 0:
+        return 0.0
+    if isinstance(vectors, np.ndarray):
+        return float(np.einsum("ij,ij->i", vectors, baseline_vectors).mean())
+    return float((vectors * baseline_vectors).sum(-1).mean())  # only the scalar leaves the GPU
+
+
+def run_sample(base_command: List[str], base_env: Dict[str, str], prompt_text: str, sample: bytes) -> str:
+    """Runs the command once for an encoded sample input; returns its decoded stdout."""
+    env = {**base_env, "PROMPT_OVERRIDE": prompt_text}
+    proc = subprocess.run(
+        base_command,
+        input=sample,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    return proc.stdout.decode("utf-8", errors="replace")
+
+
+class PersistentCommand:
+    """Keeps one command process alive and exchanges length-prefixed frames with it."""
+
+    def __init__(self, base_command: List[str]):
+        self.proc = subprocess.Popen(base_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.lock = threading.Lock()
+        self._prompt = None
+        self._prompt_frame = b""
+
+    @staticmethod
+    def frame(data: bytes) -> bytes:
+        return b"%d\n%s" % (len(data), data)
+
+    def __call__(self, prompt_text: str, sample: bytes) -> str:
+        sample_frame = self.frame(sample)
+        with self.lock:  # one conversation at a time on the shared pipes
+            # All samples of a candidate share its prompt; encode it once.
+            if prompt_text is not self._prompt:
+                self._prompt = prompt_text
+                self._prompt_frame = self.frame(prompt_text.encode("utf-8"))
+            self.proc.stdin.write(self._prompt_frame + sample_frame)
+            self.proc.stdin.flush()
+            header = self.proc.stdout.readline()
+            if not header:
+                raise RuntimeError("persistent command exited")
+            size = int(header)
+            data = self.proc.stdout.read(size)
+        if len(data) != size:
+            raise RuntimeError("persistent command closed mid-reply")
+        return data.decode("utf-8", errors="replace")
+
+    def close(self, timeout: float = 5.0):
+        """Closes stdin and waits for exit, escalating if the worker ignores EOF."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass  # worker already gone (broken pipe)
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+
+Runner = Callable[[str, bytes], str]
+
+
+@contextmanager
+def command_runner(base_command: List[str], persistent: bool = False):
+    """Yields run(prompt_text, sample) -> stdout for the configured command mode."""
+    if not persistent:
+        # The environment is snapshotted once; each run only adds PROMPT_OVERRIDE.
+        yield partial(run_sample, base_command, os.environ.copy())
+        return
+    worker = PersistentCommand(base_command)
     try:
-        subprocess.run(
-            ["zstd", "-q", "-T0", "-22", "-f", tmp_in_path, "-o", tmp_out_path],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        size = os.path.getsize(tmp_out_path)
+        yield worker
     finally:
-        os.unlink(tmp_in_path)
-        if os.path.exists(tmp_out_path):
-            os.unlink(tmp_out_path)
-    return size
+        worker.close()
+
+
+def run_samples(executor: Executor, run: Runner, prompt_text: str, sample_bytes: List[bytes]) -> List[str]:
+    """Runs all samples concurrently (they are independent); results keep input order."""
+    return list(executor.map(lambda sample: run(prompt_text, sample), sample_bytes))
+
 
+def score_terms(compressed: int, entropy: float, similarity: float) -> float:
+    return compressed + entropy * 100 - similarity * 1000
 
-def evaluate_prompt(prompt_text: str, base_command: List[str], sample_inputs: List[str], model: SentenceTransformer, baseline_vectors: List[np.ndarray]) -> PromptCandidate:
+
+def rescore_reordered(candidate: PromptCandidate, prompt_text: str) -> PromptCandidate:
+    """Scores a line reordering of candidate without re-running the command.
+
+    Treats outputs as order-invariant: similarity and entropy carry over and
+    only the compressed size is recomputed.
+    """
+    return replace(
+        candidate,
+        text=prompt_text,
+        score=score_terms(compress_size(prompt_text.encode("utf-8")), candidate.entropy, candidate.similarity),
+        length=len(prompt_text),
+    )
+
+
+def evaluate_prompt(prompt_text: str, run: Runner, sample_bytes: List[bytes], model: SentenceTransformer, baseline_vectors: Vectors, executor: Executor) -> PromptCandidate:
     outputs = []
     combined_tokens = []
 
-    for sample in sample_inputs:
-        env = os.environ.copy()
-        env["PROMPT_OVERRIDE"] = prompt_text
-        proc = subprocess.run(
-            base_command,
-            input=sample.encode("utf-8"),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=env,
-        )
-        out = proc.stdout.decode("utf-8", errors="replace")
+    for out in run_samples(executor, run, prompt_text, sample_bytes):
         outputs.append(out.strip())
         combined_tokens.extend(out.split())
 
-    vectors = model.encode(outputs)
-    sims = []
-    for vec, base_vec in zip(vectors, baseline_vectors):
-        denom = np.linalg.norm(vec) * np.linalg.norm(base_vec)
-        sims.append(float(np.dot(vec, base_vec) / denom) if denom else 0.0)
-
-    avg_sim = float(np.mean(sims)) if sims else 0.0
+    avg_sim = mean_similarity(encode_cached(model, outputs), baseline_vectors)
     entropy = shannon_entropy(combined_tokens)
-    compressed = compress_size(prompt_text)
+    compressed = compress_size(prompt_text.encode("utf-8"))
 
-    score = compressed + entropy * 100 - avg_sim * 1000
     return PromptCandidate(
         text=prompt_text,
-        score=score,
+        score=score_terms(compressed, entropy, avg_sim),
         length=len(prompt_text),
         similarity=avg_sim,
         entropy=entropy,
     )
 
 
-def mutate_prompt(lines: List[str]) -> List[str]:
+_ACTIONS = ("delete", "swap", "shuffle", "trim")
+REORDER_ACTIONS = {"swap", "shuffle"}
+# One generator for all draws in this process; replicas reseed it per worker.
+_RNG = np.random.default_rng()
+
+
+def seed_rng(seed: int):
+    global _RNG
+    _RNG = np.random.default_rng(seed)
+
+
+def mutate_prompt(lines: List[str]) -> Tuple[List[str], str]:
+    """Returns (mutated lines, action name)."""
     candidate = lines.copy()
     if not candidate:
-        return candidate
+        return candidate, "noop"
 
-    action = random.choice(["delete", "swap", "shuffle", "trim"])
+    action = _ACTIONS[_RNG.integers(len(_ACTIONS))]
     if action == "delete" and len(candidate) > 1:
-        idx = random.randrange(len(candidate))
+        idx = _RNG.integers(len(candidate))
         candidate.pop(idx)
     elif action == "swap" and len(candidate) > 1:
-        a, b = random.sample(range(len(candidate)), 2)
+        a, b = _RNG.choice(len(candidate), size=2, replace=False)
         candidate[a], candidate[b] = candidate[b], candidate[a]
     elif action == "shuffle":
-        random.shuffle(candidate)
+        _RNG.shuffle(candidate)
     elif action == "trim":
-        idx = random.randrange(len(candidate))
+        idx = _RNG.integers(len(candidate))
         tokens = candidate[idx].split()
         if len(tokens) > 4:
-            take = max(1, len(tokens) - random.randint(1, 3))
+            take = max(1, len(tokens) - _RNG.integers(1, 4))
             candidate[idx] = " ".join(tokens[:take])
-    return candidate
+    return candidate, action
 
 
-def anneal(prompt_path: Path, base_command: List[str], sample_inputs: List[str], iterations: int, temperature: float, output_path: Path):
-    baseline_text = prompt_path.read_text(encoding="utf-8")
+def anneal_chain(run: Runner, baseline_text: str, sample_bytes: List[bytes], baseline_outputs: List[str], iterations: int, temperature: float, output_path: Path = None, tag: str = "annealer") -> Tuple[PromptCandidate, PromptCandidate]:
+    """Runs one annealing chain; writes improvements to output_path when given."""
     baseline_lines = baseline_text.splitlines()
-
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    baseline_outputs = []
-    for sample in sample_inputs:
-        env = os.environ.copy()
-        env["PROMPT_OVERRIDE"] = baseline_text
-        proc = subprocess.run(
-            base_command,
-            input=sample.encode("utf-8"),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=env,
-        )
-        baseline_outputs.append(proc.stdout.decode("utf-8", errors="replace").strip())
-
-    baseline_vectors = model.encode(baseline_outputs)
-    baseline_candidate = evaluate_prompt(baseline_text, base_command, sample_inputs, model, baseline_vectors)
-
-    best_candidate = baseline_candidate
-    current_lines = baseline_lines
-
-    for step in range(iterations):
-        temp = max(0.01, temperature * (1.0 - step / iterations))
-        mutated_lines = mutate_prompt(current_lines)
-        mutated_text = "\n".join(mutated_lines)
-
-        candidate = evaluate_prompt(mutated_text, base_command, sample_inputs, model, baseline_vectors)
-
-        delta = candidate.score - best_candidate.score
-        accept = delta < 0 or math.exp(-delta / temp) > random.random()
-
-        if accept:
-            current_lines = mutated_lines
-            if candidate.score < best_candidate.score:
-                best_candidate = candidate
-                output_path.write_text(candidate.text, encoding="utf-8")
-                print(f"[annealer] improved @ step {step}: score={candidate.score:.2f} len={candidate.length} sim={candidate.similarity:.3f}", flush=True)
+    # Built per chain so spawned replicas get the same dictionary as the parent.
+    # Dictionary from inputs/outputs only, never the prompt (keeps the length signal).
+    set_compression_dict([*sample_bytes, *(out.encode("utf-8") for out in baseline_outputs)])
+
+    model = load_model()
+    # Command runs block on subprocess I/O, so threads are enough to overlap them.
+    with ThreadPoolExecutor(max_workers=len(sample_bytes)) as executor:
+        # Reference rows are already unit length; keep them as one contiguous
+        # float32 (N, d) block so every candidate is a single row-wise dot.
+        baseline_vectors = encode_cached(model, baseline_outputs)
+        if isinstance(baseline_vectors, np.ndarray):
+            baseline_vectors = np.ascontiguousarray(baseline_vectors, dtype=np.float32)
+        else:
+            baseline_vectors = baseline_vectors.contiguous()
+        baseline_candidate = evaluate_prompt(baseline_text, run, sample_bytes, model, baseline_vectors, executor)
+
+        best_candidate = baseline_candidate
+        current_candidate = baseline_candidate
+        current_lines = baseline_lines
+
+        def accepts(candidate: PromptCandidate, temp: float) -> bool:
+            delta = candidate.score - best_candidate.score
+            return delta < 0 or math.exp(-delta / temp) > _RNG.random()
+
+        for step in range(iterations):
+            temp = max(0.01, temperature * (1.0 - step / iterations))
+            mutated_lines, action = mutate_prompt(current_lines)
+            mutated_text = "\n".join(mutated_lines)
+
+            if mutated_lines == current_lines:
+                candidate = current_candidate
+            else:
+                if action in REORDER_ACTIONS:
+                    # Same lines, new order: the carried-over score is only a
+                    # pre-filter; anything it doesn't reject is measured below.
+                    if not accepts(rescore_reordered(current_candidate, mutated_text), temp):
+                        continue
+                candidate = evaluate_prompt(mutated_text, run, sample_bytes, model, baseline_vectors, executor)
+
+            if accepts(candidate, temp):
+                current_lines = mutated_lines
+                current_candidate = candidate
+                if candidate.score < best_candidate.score:
+                    best_candidate = candidate
+                    if output_path is not None:
+                        output_path.write_text(candidate.text, encoding="utf-8")
+                    print(f"[{tag}] improved @ step {step}: score={candidate.score:.2f} len={candidate.length} sim={candidate.similarity:.3f}", flush=True)
+
+    return baseline_candidate, best_candidate
+
+
+def replica_chain(base_command: List[str], persistent: bool, seed: int, *chain_args) -> Tuple[PromptCandidate, PromptCandidate]:
+    """Pool entry point: seeds this worker and gives it its own command runner."""
+    seed_rng(seed)
+    with command_runner(base_command, persistent) as run:
+        return anneal_chain(run, *chain_args)
+
+
+def anneal(prompt_path: Path, base_command: List[str], sample_inputs: List[str], iterations: int, temperature: float, output_path: Path, replicas: int = 1, persistent: bool = False):
+    baseline_text = prompt_path.read_text(encoding="utf-8")
+    # Samples never change, so encode them once for every run of every chain.
+    sample_bytes = [s.encode("utf-8") for s in sample_inputs]
+
+    with command_runner(base_command, persistent) as run:
+        # Baseline outputs are the similarity reference, so gather them once
+        # and share them with every chain.
+        with ThreadPoolExecutor(max_workers=len(sample_bytes)) as executor:
+            baseline_outputs = [out.strip() for out in run_samples(executor, run, baseline_text, sample_bytes)]
+
+        if replicas <= 1:
+            baseline_candidate, best_candidate = anneal_chain(
+                run, baseline_text, sample_bytes, baseline_outputs, iterations, temperature, output_path
+            )
+
+    if replicas > 1:
+        # Independent chains are embarrassingly parallel; each worker loads its
+        # own model, and only the parent writes the winning prompt.
+        seeds = _RNG.integers(2**32, size=replicas).tolist()
+        jobs = [
+            (base_command, persistent, seed, baseline_text, sample_bytes, baseline_outputs, iterations, temperature, None, f"annealer r{i}")
+            for i, seed in enumerate(seeds)
+        ]
+        with mp.get_context("spawn").Pool(replicas) as pool:
+            results = pool.starmap(replica_chain, jobs)
+        baseline_candidate = results[0][0]
+        best_candidate = min((best for _, best in results), key=lambda c: c.score)
+        if best_candidate.score < baseline_candidate.score:
+            output_path.write_text(best_candidate.text, encoding="utf-8")
 
     print("[annealer] baseline:", baseline_candidate)
     print("[annealer] best:", best_candidate)
@@ -197,9 +416,12 @@ def main():
     parser.add_argument("prompt", type=Path, help="Path to prompt file")
     parser.add_argument("--input", "-i", action="append", default=[], help="Sample input file(s)")
     parser.add_argument("--cmd", "-c", required=True, help="Command to run (quoted string)")
-+    parser.add_argument("--iterations", type=int, default=100, help="Number of annealing steps")
-+    parser.add_argument("--temperature", type=float, default=1.0, help="Initial temperature")
-+    parser.add_argument("--output", "-o", type=Path, default=None, help="Where to write best prompt")
+    parser.add_argument("--iterations", type=int, default=100, help="Number of annealing steps")
+    parser.add_argument("--temperature", type=float, default=1.0, help="Initial temperature")
+    parser.add_argument("--output", "-o", type=Path, default=None, help="Where to write best prompt")
+    parser.add_argument("--replicas", type=int, default=1, help="Independent annealing chains to run in parallel")
+    parser.add_argument("--seed", type=int, default=None, help="Seed mutations, acceptance and replica seeds for reproducible runs")
+    parser.add_argument("--persistent", action="store_true", help="Start --cmd once and talk to it with length-prefixed frames")
     args = parser.parse_args()
 
     sample_inputs = []
@@ -208,9 +430,12 @@ def main():
     if not sample_inputs:
         sample_inputs = [""]  # default empty input
 
+    if args.seed is not None:
+        seed_rng(args.seed)
+
     base_command = ["bash", "-lc", args.cmd]
     output_path = args.output or (args.prompt.parent / (args.prompt.stem + ".annealed" + args.prompt.suffix))
-    anneal(args.prompt, base_command, sample_inputs, args.iterations, args.temperature, output_path)
+    anneal(args.prompt, base_command, sample_inputs, args.iterations, args.temperature, output_path, args.replicas, args.persistent)
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 import argparse
 import numpy as np
 import pennylane as qml
+from pennylane import numpy as pnp
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--qubo", required=True)
@@ -12,46 +13,68 @@ parser.add_argument("--seed", type=int, default=42)
 args = parser.parse_args()
 
 np.random.seed(args.seed)
-Q = np.load(args.qubo)
+# Read once as a contiguous float32 block; everything below slices this copy.
+Q = np.ascontiguousarray(np.load(args.qubo), dtype=np.float32)
 n = Q.shape[0]
-dev = qml.device("default.qubit", wires=n, shots=args.shots)
+# Native state-vector simulator; analytic for training, shots only for sampling.
+dev = qml.device("lightning.qubit", wires=n)
 
-@qml.qnode(dev)
-def circuit(gammas, betas):
+# Cost and mixer Hamiltonians are fixed by Q, so build them once; each layer is
+# then one exp(-i*gamma*H) / exp(-i*beta*H) op instead of O(n^2) gate triples.
+# RZ(2*g*c) == exp(-i*g*c*Z) and CNOT-RZ-CNOT == exp(-i*g*c*Z@Z), so the plain
+# Q entries are the coefficients.
+# Prune near-zero Q entries once into SoA arrays (field weights h_*, couplings
+# i/j/w) and build the Pauli terms from those.
+diag = np.diag(Q)
+h_idx = np.flatnonzero(np.abs(diag) > 1e-9)
+h_arr = diag[h_idx]
+iu, ju = np.triu_indices(n, k=1)
+w_all = Q[iu, ju]
+mask = np.abs(w_all) > 1e-9
+i_arr, j_arr, w_arr = iu[mask], ju[mask], w_all[mask]
+
+coeffs = np.concatenate([h_arr, w_arr]).tolist()
+ops = [qml.PauliZ(int(i)) for i in h_idx]
+ops += [qml.PauliZ(int(i)) @ qml.PauliZ(int(j)) for i, j in zip(i_arr, j_arr)]
+H_cost = qml.Hamiltonian(coeffs, ops)
+H_mixer = qml.Hamiltonian([1.0] * n, [qml.PauliX(i) for i in range(n)])
+
+def qaoa_layers(gammas, betas):
     for w in range(n):
         qml.Hadamard(wires=w)
     for layer in range(len(gammas)):
-        gamma = gammas[layer]
-        beta = betas[layer]
-        for i in range(n):
-            qml.RZ(2 * gamma * Q[i, i], wires=i)
-        for i in range(n):
-            for j in range(i + 1, n):
-                if abs(Q[i, j]) > 1e-9:
-                    qml.CNOT(wires=[i, j])
-                    qml.RZ(2 * gamma * Q[i, j], wires=j)
-                    qml.CNOT(wires=[i, j])
-        for i in range(n):
-            qml.RX(2 * beta, wires=i)
+        qml.ApproxTimeEvolution(H_cost, gammas[layer], 1)
+        qml.ApproxTimeEvolution(H_mixer, betas[layer], 1)
+
+@qml.set_shots(args.shots)
+@qml.qnode(dev)
+def circuit(gammas, betas):
+    qaoa_layers(gammas, betas)
     return qml.sample()
 
 L = args.layers
 init_gammas = 0.01 * np.random.randn(L)
 init_betas = 0.01 * np.random.randn(L)
-params = np.concatenate([init_gammas, init_betas])
+params = pnp.array(np.concatenate([init_gammas, init_betas]), requires_grad=True)
 
 opt = qml.GradientDescentOptimizer(stepsize=0.1)
 
-cost_fn = qml.ExpvalCost(lambda p:
-    circuit(p[:L], p[L:]), dev, qml.Hermitian(Q, wires=range(n))
-)
+# Exact <H_cost> with adjoint gradients: one backward sweep for all 2L params.
+@qml.qnode(dev, diff_method="adjoint")
+def cost_fn(p):
+    qaoa_layers(p[:L], p[L:])
+    return qml.expval(H_cost)
 
 params = opt.step(cost_fn, params)
 bitstrings = circuit(params[:L], params[L:])
-counts = {}
-for bitstring in bitstrings:
-    key = "".join(str(b) for b in bitstring)
-    counts[key] = counts.get(key, 0) + 1
+# Pack each shot into one int (wire 0 = most significant bit, so binary_repr
+# reads like the sample row) and tally in numpy instead of building strings.
+bitstrings = np.asarray(bitstrings, dtype=np.int64).reshape(-1, n)
+packed = bitstrings @ (1 << np.arange(n - 1, -1, -1, dtype=np.int64))
+vals, cnts = np.unique(packed, return_counts=True)
+top = min(10, cnts.size)
+top_idx = np.argpartition(-cnts, top - 1)[:top] if top < cnts.size else np.arange(cnts.size)
+top_idx = top_idx[np.argsort(-cnts[top_idx], kind="stable")]
 
-for key, count in sorted(counts.items(), key=lambda x: -x[1])[:10]:
-    print(key, count)
+for v, count in zip(vals[top_idx], cnts[top_idx]):
+    print(np.binary_repr(v, width=n), count)